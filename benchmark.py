@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import sysconfig
+import time
+
+import numpy as np
+
+from data.data_io import load_data
+from optimize import Worker, create_executor
+from util.search_space import SearchSpace
+
+
+def random_candidates(space: SearchSpace, count: int, seed: int):
+    random = np.random.default_rng(seed)
+    return [(
+        int(random.integers(1, min(space.length - 2, 250), endpoint=True)),
+        random.random(),
+        random.random(),
+        random.uniform(0, 5),
+        random.uniform(0, 5),
+        random.uniform(0, 10),
+        random.random(),
+    ) for _ in range(count)]
+
+
+def run(executor_type: str, num_workers: int, input_data, space: SearchSpace, candidates):
+    start = time.perf_counter()
+    with create_executor(executor_type, num_workers, input_data, space.to_params) as executor:
+        losses = list(executor.map(Worker.objective_function, *zip(*candidates)))
+    return time.perf_counter() - start, losses
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare thread and process executors on this interpreter')
+    parser.add_argument('--evaluations', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f'{sys.version.split()[0]}, free-threaded build: {bool(sysconfig.get_config_var("Py_GIL_DISABLED"))}, '
+          f'GIL enabled: {gil_enabled}')
+
+    input_data = load_data()
+    space = SearchSpace(len(input_data))
+    candidates = random_candidates(space, args.evaluations, args.seed)
+    expected = None
+    for num_workers in sorted(set(args.workers)):
+        for executor_type in ('process', 'thread'):
+            elapsed, losses = run(executor_type, num_workers, input_data, space, candidates)
+            if expected is None:
+                expected = losses
+            assert losses == expected, f'{executor_type} executor returned different losses'
+            print(f'{executor_type:>7} x {num_workers:<3} {elapsed:8.2f} s {len(candidates) / elapsed:10.1f} evals/s')
@@ -0,0 +1,216 @@
+import time
+
+# 尽早记录启动时间，pandas、nevergrad等耗时较长的依赖库只在需要它们的子命令内部导入
+_START = time.perf_counter()
+
+import argparse
+import dataclasses
+import json
+import sys
+
+from remote.protocol import BATCH_SIZE, parse_address
+from util.constants import TRANSACTION_PARAMS
+from util.optimize_params import OPTIMIZE_PARAMS, OptimizeParams
+from util.transaction_params import TransactionParams
+
+
+def _report_startup():
+    print(f'startup: {(time.perf_counter() - _START) * 1000:.0f} ms', file=sys.stderr)
+
+
+def _make_params(cls, default, file: str | None, overrides: dict):
+    """
+    按默认值、参数文件（JSON）、命令行参数的顺序合并参数
+    :param cls: 参数类型
+    :param default: 默认参数
+    :param file: 参数文件
+    :param overrides: 命令行参数，值为None时忽略
+    :return: 参数
+    """
+    values = dataclasses.asdict(default)
+    if file is not None:
+        with open(file, encoding='utf-8') as f:
+            values.update(json.load(f))
+    values.update((key, value) for key, value in overrides.items() if value is not None)
+    return cls(**values)
+
+
+def _transaction_params(args: argparse.Namespace):
+    return _make_params(TransactionParams, TRANSACTION_PARAMS, args.params, {
+        field.name: getattr(args, field.name) for field in dataclasses.fields(TransactionParams)
+    })
+
+
+def _load_data(args: argparse.Namespace):
+    from data.data_io import load_data
+
+    return load_data() if args.data is None else load_data(args.data)
+
+
+def _state_file(output_file) -> str:
+    return f'{output_file}.state'
+
+
+def _report(args: argparse.Namespace):
+    import os
+
+    from core.snapshot import can_resume, load_snapshot, save_snapshot
+    from core.transaction import Transaction, create_output
+    from data.data_io import OUTPUT_FILE, append_data, save_data
+
+    _report_startup()
+    input_data = _load_data(args)
+    params = _transaction_params(args)
+    output_file = args.output or OUTPUT_FILE
+    if args.num_workers is not None:
+        from core.parallel_transaction import parallel_transact
+
+        save_data(parallel_transact(input_data, params, args.num_workers, args.segments), output_file)
+        return
+
+    state_file = _state_file(output_file)
+    snapshot = None
+    if args.incremental and os.path.exists(output_file):
+        snapshot = load_snapshot(state_file)
+    resume = can_resume(snapshot, Transaction.__name__, params, input_data)
+    if snapshot is not None and not resume:
+        print('state does not match the parameters or data, writing the whole report')
+
+    output = create_output()
+    transaction = Transaction(input_data, output, params, snapshot)
+    transaction.transact()
+    if resume:
+        append_data(output, output_file)
+    else:
+        save_data(output, output_file)
+    if args.incremental:
+        save_snapshot(transaction.snapshot(), state_file)
+
+
+def _batch_report(args: argparse.Namespace):
+    from core.batch_report import batch_report
+    from data.data_io import BATCH_OUTPUT_FILE, save_sheets
+    from util.top_params import TOP_PARAMS_FILE, read_top_params
+
+    _report_startup()
+    params_list = read_top_params(args.params or TOP_PARAMS_FILE, args.top)
+    save_sheets(batch_report(params_list, _load_data(args), args.num_workers), args.output or BATCH_OUTPUT_FILE)
+
+
+def _profit(args: argparse.Namespace):
+    from core.transaction_profit import TransactionProfit
+
+    _report_startup()
+    if args.state is None:
+        print(TransactionProfit(_transaction_params(args), _load_data(args)).transact())
+        return
+
+    from core.snapshot import load_snapshot, save_snapshot
+
+    transaction = TransactionProfit(_transaction_params(args), _load_data(args))
+    print(transaction.transact(load_snapshot(args.state)))
+    save_snapshot(transaction.snapshot(), args.state)
+
+
+def _optimize(args: argparse.Namespace):
+    import optimize
+
+    _report_startup()
+    optimize_params = _make_params(OptimizeParams, OPTIMIZE_PARAMS, args.params, {
+        'seed': args.seed,
+        'iteration_count': args.budget,
+        'initial_x': args.initial_x,
+        'stagnation_window': args.window,
+        'stagnation_threshold': args.threshold,
+        'stagnation_patience': args.patience,
+        'max_restarts': args.max_restarts,
+        'max_time': args.max_time,
+    })
+    if optimize_params.initial_x is not None:
+        optimize_params = dataclasses.replace(optimize_params, initial_x=tuple(optimize_params.initial_x))
+    optimize.optimize(optimize_params, _load_data(args), listen=args.listen, num_workers=args.num_workers,
+                      batch_size=args.batch_size, surrogate=args.surrogate, legacy_space=args.legacy_space,
+                      executor_type=args.executor)
+
+
+def _add_transaction_params(parser: argparse.ArgumentParser):
+    parser.add_argument('--params', default=None,
+                        help='JSON file with TransactionParams fields, overridden by the flags below')
+    for field in dataclasses.fields(TransactionParams):
+        parser.add_argument(f'-{field.name}', type=field.type, default=None)
+
+
+def main(argv: list[str] | None = None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--data', default=None, help='Input data file')
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(required=True)
+
+    report_parser = subparsers.add_parser('report', parents=[common],
+                                          help='Write the daily transaction report')
+    _add_transaction_params(report_parser)
+    report_parser.add_argument('--output', default=None, help='Output file')
+    report_mode = report_parser.add_mutually_exclusive_group()
+    report_mode.add_argument('--incremental', action='store_true',
+                             help='Only simulate and append rows added since the last incremental report '
+                                  '(state is kept next to the output file)')
+    report_mode.add_argument('--num-workers', type=int, default=None,
+                             help='Simulate segments of the series speculatively on this many worker processes')
+    report_parser.add_argument('--segments', type=int, default=None,
+                               help='Number of segments with --num-workers (default: 4 per worker)')
+    report_parser.set_defaults(command=_report)
+
+    batch_report_parser = subparsers.add_parser('batch-report', parents=[common],
+                                                help='Write daily reports of the best parameter sets side by side')
+    batch_report_parser.add_argument('--params', default=None,
+                                     help='JSON file with a list of TransactionParams objects '
+                                          '(default: top_params.json, the best distinct candidates of optimize)')
+    batch_report_parser.add_argument('--top', type=int, default=50, help='Number of parameter sets')
+    batch_report_parser.add_argument('--num-workers', type=int, default=None, help='Number of worker processes')
+    batch_report_parser.add_argument('--output', default=None, help='Output file')
+    batch_report_parser.set_defaults(command=_batch_report)
+
+    profit_parser = subparsers.add_parser('profit', parents=[common],
+                                          help='Print the profit of one parameter set')
+    _add_transaction_params(profit_parser)
+    profit_parser.add_argument('--state', default=None,
+                               help='Snapshot file; only rows added since the snapshot are simulated')
+    profit_parser.set_defaults(command=_profit)
+
+    optimize_parser = subparsers.add_parser('optimize', parents=[common],
+                                            help='Search for the most profitable parameters')
+    optimize_parser.add_argument('--params', default=None,
+                                 help='JSON file with OptimizeParams fields, overridden by the flags below')
+    optimize_parser.add_argument('--seed', type=int, default=None)
+    optimize_parser.add_argument('--budget', type=int, default=None, help='Number of evaluations')
+    optimize_parser.add_argument('--initial-x', type=float, nargs=7, default=None,
+                                 metavar=tuple(field.name for field in dataclasses.fields(TransactionParams)))
+    optimize_parser.add_argument('--window', type=int, default=None,
+                                 help='Number of evaluations over which the best-loss improvement is measured')
+    optimize_parser.add_argument('--threshold', type=float, default=None,
+                                 help='Relative best-loss improvement per window below which a window is stagnant')
+    optimize_parser.add_argument('--patience', type=int, default=None,
+                                 help='Number of consecutive stagnant windows before stopping or restarting')
+    optimize_parser.add_argument('--max-restarts', type=int, default=None,
+                                 help='Restart with a new seed around the best candidate after stagnating')
+    optimize_parser.add_argument('--max-time', type=float, default=None, help='Wall-clock budget in seconds')
+    optimize_parser.add_argument('--listen', type=parse_address, default=None,
+                                 help='Listen on HOST:PORT and evaluate on remote workers (see run_worker.py)')
+    optimize_parser.add_argument('--num-workers', type=int, default=None,
+                                 help='Number of local worker processes, or expected number of remote workers')
+    optimize_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                                 help='Number of candidates sent to a remote worker at once')
+    optimize_parser.add_argument('--surrogate', action='store_true',
+                                 help='Skip candidates that a k-NN surrogate predicts to be clearly worse')
+    optimize_parser.add_argument('--executor', choices=('thread', 'process'), default='process',
+                                 help='Evaluate on a thread pool (shared data) or a process pool')
+    optimize_parser.add_argument('--legacy-space', action='store_true',
+                                 help='Search independent T/M/R bounds and reject infeasible proposals')
+    optimize_parser.set_defaults(command=_optimize)
+
+    args = parser.parse_args(argv)
+    args.command(args)
+
+
+if __name__ == '__main__':
+    main()
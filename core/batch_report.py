@@ -0,0 +1,69 @@
+import dataclasses
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from core.transaction import EXIT_PROFIT, Transaction, create_output
+from data.data_io import load_data
+from util.transaction_params import TransactionParams
+
+SUMMARY_SHEET = '汇总'
+
+
+class ReportWorker:
+    # 每个工作进程只接收一次输入数据，所有参数共享
+    input_data: pd.DataFrame
+
+    @classmethod
+    def initializer(cls, input_data: pd.DataFrame | None = None):
+        cls.input_data = load_data() if input_data is None else input_data
+
+    @classmethod
+    def report(cls, params: TransactionParams):
+        output = create_output()
+        Transaction(cls.input_data, output, params).transact()
+        return output
+
+
+def summarize(params: TransactionParams, output: pd.DataFrame):
+    """
+    汇总一份每日信息表
+    :param params: 交易参数
+    :param output: 每日信息表
+    :return: 汇总信息
+    """
+    exit_profits = output[EXIT_PROFIT].dropna()
+    exit_count = len(exit_profits)
+    win_count = int((exit_profits > 0).sum())
+    return {
+        **dataclasses.asdict(params),
+        '离市次数': exit_count,
+        '盈利次数': win_count,
+        '胜率': win_count / exit_count if exit_count else float('nan'),
+        '累计离市利润(元)': exit_profits.sum(),
+        '最后离市利润(元)': exit_profits.iloc[-1] if exit_count else 0.0,
+    }
+
+
+def batch_report(params_list: list[TransactionParams], input_data: pd.DataFrame | None = None,
+                 num_workers: int | None = None):
+    """
+    使用进程池并行计算多组参数的每日信息表
+    :param params_list: 交易参数列表
+    :param input_data: 输入数据，为None时加载默认数据文件
+    :param num_workers: 工作进程数目，为None时使用CPU核心数
+    :return: 工作表名称到表格的字典，第一个为汇总表，其余依次为各组参数的每日信息表
+    """
+    if input_data is None:
+        input_data = load_data()
+    num_workers = min(num_workers or os.cpu_count() or 1, len(params_list)) or 1
+    with ProcessPoolExecutor(num_workers, initializer=ReportWorker.initializer,
+                             initargs=(input_data,)) as executor:
+        outputs = list(executor.map(ReportWorker.report, params_list))
+    sheet_names = [str(rank) for rank in range(1, len(params_list) + 1)]
+    summary = pd.DataFrame([
+        {'工作表': sheet_name, **summarize(params, output)}
+        for sheet_name, params, output in zip(sheet_names, params_list, outputs)
+    ])
+    return {SUMMARY_SHEET: summary, **dict(zip(sheet_names, outputs))}
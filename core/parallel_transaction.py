@@ -0,0 +1,97 @@
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from core.snapshot import EngineState
+from core.transaction import Transaction, create_output
+from data.data_io import load_data
+from util.constants import TRANSACTION_PARAMS
+from util.transaction_params import TransactionParams
+
+
+class SegmentWorker:
+    # 每个工作进程只接收一次输入数据并计算一次指标，所有分段共享
+    transaction: Transaction
+
+    @classmethod
+    def initializer(cls, input_data: pd.DataFrame, params: TransactionParams):
+        cls.transaction = Transaction(input_data, create_output(), params)
+
+    @classmethod
+    def speculate(cls, start: int, stop: int):
+        """
+        假设[start, stop)行开始前未入市，计算这一段的每日信息
+        :param start: 开始的行
+        :param stop: 结束的行（不包括）
+        :return: 每日信息表、开始计算前未入市的行、结束时的交易状态（未入市时为None）
+        """
+        output = create_output()
+        transaction = cls.transaction
+        transaction.reset(output)
+        flat_points = []
+        transaction.transact_range(start, stop, flat_points=flat_points)
+        return output, flat_points, None if transaction.flat else transaction.state
+
+
+def split_segments(start: int, stop: int, segment_count: int):
+    """
+    把[start, stop)行平均分为segment_count段
+    :param start: 开始的行
+    :param stop: 结束的行（不包括）
+    :param segment_count: 段数
+    :return: 每一段的开始和结束的行
+    """
+    length = stop - start
+    segment_count = max(min(segment_count, length), 1)
+    bounds = [start + length * i // segment_count for i in range(segment_count + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parallel_transact(input_data: pd.DataFrame | None = None, params: TransactionParams = TRANSACTION_PARAMS,
+                      num_workers: int | None = None, segment_count: int | None = None):
+    """
+    分段并行计算每日信息表，结果与Transaction.transact完全相同。
+    每一段都假设开始前未入市并在工作进程中计算，然后按顺序拼接：
+    真实状态在某一段开始前未入市时直接使用该段的结果，否则从真实状态开始重新计算，
+    直到某一行开始前真实状态和假设状态都未入市（此后两者完全相同），再使用该段剩余的结果
+    :param input_data: 输入数据，为None时加载默认数据文件
+    :param params: 交易参数
+    :param num_workers: 工作进程数目，为None时使用CPU核心数
+    :param segment_count: 段数，为None时为工作进程数目的4倍
+    :return: 每日信息表
+    """
+    if input_data is None:
+        input_data = load_data()
+    num_workers = num_workers or os.cpu_count() or 1
+    # 用于重新计算未能同步的部分
+    transaction = Transaction(input_data, create_output(), params)
+    segments = split_segments(transaction.start, transaction.stop, segment_count or num_workers * 4)
+
+    outputs = []
+    state: EngineState | None = None  # 当前段开始前的真实交易状态，None表示未入市
+    with ProcessPoolExecutor(num_workers, initializer=SegmentWorker.initializer,
+                             initargs=(input_data, params)) as executor:
+        results = executor.map(SegmentWorker.speculate, *zip(*segments))
+        for (start, stop), (output, flat_points, end_state) in zip(segments, results):
+            if state is not None:
+                rerun_output = create_output()
+                transaction.reset(rerun_output, state)
+                sync_index = transaction.transact_range(start, stop, frozenset(flat_points))
+                if len(rerun_output):
+                    outputs.append(rerun_output)
+                if sync_index == stop:
+                    # 直到这一段结束都没有同步
+                    state = None if transaction.flat else transaction.state
+                    continue
+                output = output.loc[sync_index - params.T:]
+            if len(output):
+                outputs.append(output)
+            state = end_state
+    if not outputs:
+        return create_output()
+    # 未入市的段中入市时间等列全部为空，保持与逐行写入时相同的列类型推断
+    # https://github.com/pandas-dev/pandas/pull/52532
+    with warnings.catch_warnings(action='ignore', category=FutureWarning):
+        return pd.concat(outputs)
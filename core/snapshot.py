@@ -0,0 +1,162 @@
+import dataclasses
+import datetime
+import hashlib
+import math
+import pathlib
+import pickle
+
+import pandas as pd
+
+from data.data_io import USE_COLUMNS
+from util.constants import HIGH, LOW, TR
+from util.transaction_params import TransactionParams
+
+
+@dataclasses.dataclass(eq=False, frozen=True)
+class EngineState:
+    """
+    某一日开始计算前的交易状态（此时不可能正在离市）
+    """
+    positions: tuple[float, ...]  # 每一次开仓价格
+    enter_type: object  # 入市类型（各引擎自己的EnterType）
+    enter_price: float  # 入市价格
+    enter_atr: float  # 入市ATR
+    current_profit: float  # 当前利润
+    max_profit: float  # 入市以来最高利润
+    stop_profit_prepared: bool  # 是否已准备止盈
+    enter_time: datetime.datetime = pd.NaT  # 入市时间（只有Transaction记录）
+
+
+@dataclasses.dataclass(eq=False, frozen=True)
+class Snapshot:
+    """
+    上一次计算到最后一日开始前的状态。最后一日会被强制到期离市，因此下一次从这一日重新开始计算
+    """
+    engine: str  # 生成快照的引擎（类名），不同引擎的交易状态不能通用
+    params: TransactionParams  # 交易参数
+    resume_index: int  # 从这一行开始继续计算
+    fingerprint: str  # 前resume_index行数据的指纹
+    state: EngineState  # 交易状态
+    high_tail: tuple[float, ...]  # resume_index之前T日的最高价
+    low_tail: tuple[float, ...]  # resume_index之前T日的最低价
+    last_atr: float  # resume_index前一日的ATR
+    atr_weight: float  # 与pandas的ewm相同，上一个ATR的权重（前一日TR为NaN时小于1）
+    last_profit: float = 0.0  # 最近一次离市利润（只有TransactionProfit使用）
+
+
+def fingerprint(input_data: pd.DataFrame, row_count: int):
+    """
+    计算前row_count行输入数据的指纹（只包含数据文件中的列）
+    :param input_data: 输入数据
+    :param row_count: 行数
+    :return: 指纹
+    """
+    hashes = pd.util.hash_pandas_object(input_data.iloc[:row_count][list(USE_COLUMNS)], index=False)
+    return hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()
+
+
+def _ewm_alpha(M: int):
+    # 与pandas相同，先把alpha换算为质心(center of mass)再换算回来，以得到完全相同的计算结果
+    alpha = 1.0 / M
+    return 1.0 / (1.0 + (1.0 - alpha) / alpha)
+
+
+def create_snapshot(engine: str, params: TransactionParams, input_data: pd.DataFrame, resume_index: int,
+                    state: EngineState, last_atr: float, last_profit: float = 0.0):
+    """
+    创建快照
+    :param engine: 引擎（类名）
+    :param params: 交易参数
+    :param input_data: 输入数据
+    :param resume_index: 下一次从这一行开始继续计算
+    :param state: resume_index这一行开始计算前的交易状态
+    :param last_atr: resume_index前一日的ATR
+    :param last_profit: 最近一次离市利润
+    :return: 快照，数据不足以继续计算时返回None
+    """
+    T = params.T
+    if resume_index <= T + params.M:
+        # ATR尚未开始滑动平均
+        return None
+    tr = input_data[TR].iloc[:resume_index].tolist()
+    # 与pandas的ewm相同，TR为NaN时上一个ATR的权重按(1 - alpha)衰减
+    old_wt_factor = 1.0 - _ewm_alpha(params.M)
+    atr_weight = 1.0
+    for value in reversed(tr):
+        if not math.isnan(value):
+            break
+        atr_weight *= old_wt_factor
+    return Snapshot(
+        engine=engine,
+        params=params,
+        resume_index=resume_index,
+        fingerprint=fingerprint(input_data, resume_index),
+        state=state,
+        high_tail=tuple(input_data[HIGH].iloc[resume_index - T:resume_index].tolist()),
+        low_tail=tuple(input_data[LOW].iloc[resume_index - T:resume_index].tolist()),
+        last_atr=last_atr,
+        atr_weight=atr_weight,
+        last_profit=last_profit,
+    )
+
+
+def can_resume(snapshot: Snapshot | None, engine: str, params: TransactionParams, input_data: pd.DataFrame):
+    """
+    判断能否从快照继续计算：由同一引擎生成、参数相同、且快照对应的数据前缀没有改变
+    :param snapshot: 快照
+    :param engine: 引擎（类名）
+    :param params: 交易参数
+    :param input_data: 输入数据
+    :return: 能否继续计算
+    """
+    return (snapshot is not None and
+            snapshot.engine == engine and
+            dataclasses.astuple(snapshot.params) == dataclasses.astuple(params) and
+            snapshot.resume_index < len(input_data) and
+            snapshot.fingerprint == fingerprint(input_data, snapshot.resume_index))
+
+
+def resume_indicators(snapshot: Snapshot, input_data: pd.DataFrame):
+    """
+    使用快照中的滑动窗口和ATR计算resume_index及之后每一行的指标
+    :param snapshot: 快照
+    :param input_data: 输入数据
+    :return: 前T日最高价、前T日最低价、ATR（从resume_index开始）
+    """
+    T = snapshot.params.T
+    start = snapshot.resume_index
+    highs = pd.Series([*snapshot.high_tail, *input_data[HIGH].iloc[start:].tolist()])
+    lows = pd.Series([*snapshot.low_tail, *input_data[LOW].iloc[start:].tolist()])
+    high_max = highs.rolling(window=T, closed='left').max().tolist()[T:]
+    low_min = lows.rolling(window=T, closed='left').min().tolist()[T:]
+
+    # pandas的ewm(adjust=False)的递推公式
+    alpha = _ewm_alpha(snapshot.params.M)
+    old_wt_factor = 1.0 - alpha
+    weighted = snapshot.last_atr
+    old_wt = snapshot.atr_weight
+    atr = []
+    for value in input_data[TR].iloc[start:].tolist():
+        old_wt *= old_wt_factor
+        if not math.isnan(value):
+            if weighted != value:
+                weighted = (old_wt * weighted + alpha * value) / (old_wt + alpha)
+            old_wt = 1.0
+        atr.append(weighted)
+    return high_max, low_min, atr
+
+
+def load_snapshot(file: str | pathlib.Path) -> Snapshot | None:
+    try:
+        with open(file, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_snapshot(snapshot: Snapshot | None, file: str | pathlib.Path):
+    if snapshot is None:
+        pathlib.Path(file).unlink(missing_ok=True)
+        return
+    with open(file, 'wb') as f:
+        pickle.dump(snapshot, f)
@@ -6,9 +6,17 @@ import warnings
 import numpy as np
 import pandas as pd
 
-from util.constants import TRANSACTION_PARAMS, HIGH, LOW, HIGH_MAX, LOW_MIN, TR, ATR
+from core.snapshot import EngineState, Snapshot, can_resume, create_snapshot, resume_indicators
+from util.constants import TRANSACTION_PARAMS, DATE, OPEN, CLOSE, HIGH, LOW, HIGH_MAX, LOW_MIN, TR, ATR
+from util.transaction_params import TransactionParams
 
-ATR_START_DATE = TRANSACTION_PARAMS.T + TRANSACTION_PARAMS.M
+EXIT_TYPE = '离市类型'
+EXIT_PROFIT = '离市利润'
+OUTPUT_COLUMNS = (
+    DATE, ATR, HIGH, LOW, OPEN, CLOSE, '入市时间', '入市类型', '入市ATR', '入市价格(元)', '多头持仓数量',
+    '空头持仓数量', LOW_MIN, HIGH_MAX, '本次入市以来最高利润(元)', '当前利润(元)', EXIT_TYPE, '离市时间',
+    EXIT_PROFIT
+)
 
 
 class EnterType(enum.StrEnum):
@@ -26,21 +34,56 @@ class ExitType(enum.StrEnum):
     Undefined = ''
 
 
+def create_output():
+    """
+    创建空的每日信息表
+    :return: 每日信息表
+    """
+    return pd.DataFrame(columns=OUTPUT_COLUMNS)
+
+
 class Transaction:
-    def __init__(self, input_data: pd.DataFrame, output_data: pd.DataFrame):
-        tr_series = input_data[TR]
-        # 计算前T日ATR
-        series = pd.concat([
-            # 前T + M日用NaN填充不会影响最终的计算结果
-            pd.Series(np.full(ATR_START_DATE, np.nan)),
-            pd.Series(tr_series[TRANSACTION_PARAMS.T + 1: ATR_START_DATE + 1].mean(skipna=False)),
-            tr_series[ATR_START_DATE + 1:],
-        ], ignore_index=True)
-        # 计算前T日最高价和最低价
-        input_data[HIGH_MAX] = input_data[HIGH].rolling(window=TRANSACTION_PARAMS.T, closed='left').max()
-        input_data[LOW_MIN] = input_data[LOW].rolling(window=TRANSACTION_PARAMS.T, closed='left').min()
-        # 计算前T日ATR
-        input_data[ATR] = series.ewm(alpha=1.0 / TRANSACTION_PARAMS.M, adjust=False).mean().fillna(0)
+    def __init__(self, input_data: pd.DataFrame, output_data: pd.DataFrame,
+                 params: TransactionParams = TRANSACTION_PARAMS, snapshot: Snapshot | None = None):
+        """
+        :param input_data: 输入数据
+        :param output_data: 每日信息表
+        :param params: 交易参数
+        :param snapshot: 上一次计算的快照，参数相同且数据前缀未改变时只计算并输出此后的数据
+        """
+        self._params = params
+        self._atr_start_date = atr_start_date = params.T + params.M
+
+        if can_resume(snapshot, Transaction.__name__, params, input_data):
+            self._start = start = snapshot.resume_index
+            high_max, low_min, atr = resume_indicators(snapshot, input_data)
+            padding = [math.nan] * start
+            # 不修改传入的数据
+            input_data = input_data.assign(**{
+                HIGH_MAX: padding + high_max,
+                LOW_MIN: padding + low_min,
+                # 前一日ATR用于生成下一次的快照
+                ATR: padding[1:] + [snapshot.last_atr] + atr,
+            })
+        else:
+            self._start = params.T
+            snapshot = None
+            tr_series = input_data[TR]
+            # 计算前T日ATR
+            series = pd.concat([
+                # 前T + M日用NaN填充不会影响最终的计算结果
+                pd.Series(np.full(atr_start_date, np.nan)),
+                pd.Series(tr_series[params.T + 1: atr_start_date + 1].mean(skipna=False)),
+                tr_series[atr_start_date + 1:],
+            ], ignore_index=True)
+            # 不修改传入的数据，以便多组参数共享同一份输入数据
+            input_data = input_data.assign(**{
+                # 计算前T日最高价和最低价
+                HIGH_MAX: input_data[HIGH].rolling(window=params.T, closed='left').max(),
+                LOW_MIN: input_data[LOW].rolling(window=params.T, closed='left').min(),
+                # 计算前T日ATR
+                ATR: series.ewm(alpha=1.0 / params.M, adjust=False).mean().fillna(0),
+            })
 
         self._input = input_data
         self._output = output_data
@@ -52,6 +95,25 @@ class Transaction:
 
         self._clear_all()
 
+        if snapshot is not None:
+            self._set_state(snapshot.state)
+        self._resume_state: EngineState | None = None  # 最后一日开始计算前的交易状态
+
+    def _get_state(self):
+        return EngineState(tuple(self._positions), self._enter_type, self._enter_price, self._enter_atr,
+                           self._current_profit, self._max_profit, self._stop_profit_prepared, self._enter_time)
+
+    def _set_state(self, state: EngineState):
+        self._clear_all()
+        self._positions.extend(state.positions)
+        self._enter_type = state.enter_type
+        self._enter_time = state.enter_time
+        self._enter_price = state.enter_price
+        self._enter_atr = state.enter_atr
+        self._current_profit = state.current_profit
+        self._max_profit = state.max_profit
+        self._stop_profit_prepared = state.stop_profit_prepared
+
     # noinspection PyTypeChecker
     def _clear_all(self):
         self._positions.clear()
@@ -161,9 +223,9 @@ class Transaction:
         :param atr: 当日ATR
         :return:
         """
-        if not self._entered or self._position_count >= TRANSACTION_PARAMS.R:
+        if not self._entered or self._position_count >= self._params.R:
             return
-        price_break = TRANSACTION_PARAMS.N * atr
+        price_break = self._params.N * atr
         if self._enter_type == EnterType.LongPosition:
             # 当日最高价高于上一次开仓价加上N个当日ATR
             open_price = self._last_open_price + price_break
@@ -244,12 +306,12 @@ class Transaction:
             return
         if self._enter_type == EnterType.LongPosition:
             # 当日最低价小于K倍入市ATR和上一次开仓价之差
-            exit_price = self._last_open_price - TRANSACTION_PARAMS.K * self._enter_atr
+            exit_price = self._last_open_price - self._params.K * self._enter_atr
             if low < exit_price:
                 self._exiting_with_price(time_today, exit_price, ExitType.LongLoss)
         elif self._enter_type == EnterType.ShortPosition:
             # 当日最高价大于K倍入市ATR和上一次开仓价之和
-            exit_price = self._last_open_price + TRANSACTION_PARAMS.K * self._enter_atr
+            exit_price = self._last_open_price + self._params.K * self._enter_atr
             if high > exit_price:
                 self._exiting_with_price(time_today, exit_price, ExitType.ShortLoss)
 
@@ -262,14 +324,14 @@ class Transaction:
         """
         if self._stop_profit_prepared:
             # 当前利润小于入市以来最高利润的比例Q时正式止盈
-            exit_profit = TRANSACTION_PARAMS.Q * self._max_profit
+            exit_profit = self._params.Q * self._max_profit
             if self._current_profit < exit_profit:
                 if self._enter_type == EnterType.LongPosition:
                     self._exiting_with_profit(time_today, exit_profit, ExitType.LongProfit)
                 elif self._enter_type == EnterType.ShortPosition:
                     self._exiting_with_profit(time_today, exit_profit, ExitType.ShortProfit)
                 self._stop_profit_prepared = False
-        elif self._entered and self._current_profit > TRANSACTION_PARAMS.P * atr:
+        elif self._entered and self._current_profit > self._params.P * atr:
             # 当前利润超过P个当日ATR时准备止盈
             self._stop_profit_prepared = True
 
@@ -331,13 +393,13 @@ class Transaction:
             exit_time = pd.NaT
             exit_profit = math.nan
 
-        if index < ATR_START_DATE:
+        if index < self._atr_start_date:
             atr = math.nan
 
         # https://github.com/pandas-dev/pandas/issues/39122
         # https://github.com/pandas-dev/pandas/pull/52532
         with warnings.catch_warnings(action='ignore', category=FutureWarning):
-            self._output.loc[index - TRANSACTION_PARAMS.T] = (
+            self._output.loc[index - self._params.T] = (
                 time_today, atr, high, low, open_price, close_price, enter_time, str(enter_type),
                 enter_atr, enter_price, long_position_count, short_position_count, high_max,
                 low_min, max_profit, current_profit, str(exit_type), exit_time, exit_profit
@@ -346,10 +408,75 @@ class Transaction:
             # 清空所有数据
             self._clear_all()
 
+    @property
+    def start(self):
+        """
+        获取第一个计算的行
+        :return: 第一个计算的行
+        """
+        return self._start
+
+    @property
+    def stop(self):
+        """
+        获取最后一个计算的行之后的行
+        :return: 最后一个计算的行之后的行
+        """
+        return self._last_index + 1
+
+    @property
+    def flat(self):
+        """
+        判断是否未入市（此时交易状态与清空后的状态相同）
+        :return: 是否未入市
+        """
+        return not self._entered
+
+    @property
+    def state(self):
+        """
+        获取当前交易状态
+        :return: 交易状态
+        """
+        return self._get_state()
+
+    def reset(self, output_data: pd.DataFrame, state: EngineState | None = None):
+        """
+        重新设置每日信息表和交易状态
+        :param output_data: 每日信息表
+        :param state: 交易状态，为None时清空
+        :return:
+        """
+        self._output = output_data
+        if state is None:
+            self._clear_all()
+        else:
+            self._set_state(state)
+
     def transact(self):
+        self.transact_range(self._start, self.stop)
+
+    def transact_range(self, start: int, stop: int, sync_points: set[int] | frozenset[int] = frozenset(),
+                       flat_points: list[int] | None = None):
+        """
+        从当前交易状态开始计算[start, stop)行
+        :param start: 开始的行
+        :param stop: 结束的行（不包括）
+        :param sync_points: 某一行开始计算前未入市且该行在sync_points中时提前停止
+        :param flat_points: 不为None时记录开始计算前未入市的行
+        :return: 停止的行（未提前停止时为stop）
+        """
+        last_index = self._last_index
         for index, time_today, open_price, close_price, \
                 high, low, tr, high_max, low_min, atr \
-                in self._input[TRANSACTION_PARAMS.T:].itertuples(name=None):
+                in self._input[start:stop].itertuples(name=None):
+            if not self._entered:
+                if index in sync_points:
+                    return index
+                if flat_points is not None:
+                    flat_points.append(index)
+            if index == last_index:
+                self._resume_state = self._get_state()
             self._enter(time_today, high, low, high_max, low_min, atr)
             self._add_position(high, low, atr)
             self._calculate_profit(close_price)
@@ -358,3 +485,15 @@ class Transaction:
             self._expire(index, time_today, close_price)
             self._write_info(index, time_today, high, low,
                              open_price, close_price, high_max, low_min, atr)
+        return stop
+
+    def snapshot(self):
+        """
+        获取上一次transact的快照，用于数据追加后继续计算
+        :return: 快照，未计算最后一日或数据不足以继续计算时返回None
+        """
+        if self._resume_state is None:
+            return None
+        last_index = self._last_index
+        return create_snapshot(Transaction.__name__, self._params, self._input, last_index, self._resume_state,
+                               self._input[ATR].iat[last_index - 1])
@@ -4,8 +4,9 @@ import math
 import numpy as np
 import pandas as pd
 
+from core.snapshot import EngineState, Snapshot, can_resume, create_snapshot, resume_indicators
 from data.data_io import load_data
-from util.constants import HIGH, LOW, HIGH_MAX, LOW_MIN, TR, ATR
+from util.constants import HIGH, LOW, TR
 from util.transaction_params import TransactionParams
 
 
@@ -16,19 +17,30 @@ class EnterType(enum.IntEnum):
 
 
 class TransactionProfit:
-    def __init__(self, params: TransactionParams | None = None):
-        input_data = load_data()
+    """
+    输入数据只读，可以在多个实例（包括不同线程中的实例）之间共享；
+    每组参数的指标和交易状态保存在实例中，因此每个线程需要使用单独的实例
+    """
+
+    def __init__(self, params: TransactionParams | None = None, input_data: pd.DataFrame | None = None):
+        if input_data is None:
+            input_data = load_data()
         self._input = input_data
         self._last_index = len(input_data) - 1
 
-        self._high_window = input_data[HIGH].rolling(window=0, closed='left')
-        self._low_window = input_data[LOW].rolling(window=0, closed='left')
         self._tr_series: pd.Series = input_data[TR]  # 输入数据TR
+        # 与itertuples相同，按列的位置依次取出每一行的数据
+        self._columns = tuple(input_data[column].tolist() for column in input_data.columns)
+        self._params: TransactionParams | None = None
+        self._indicators: tuple[list[float], list[float], list[float]] = ([], [], [])  # 前T日最高价、最低价、ATR
 
         self._positions: list[float] = []  # 每一次开仓价格
 
         self._clear_all()
 
+        # 最后一日开始计算前的状态：(交易状态, 最近一次离市利润, 前一日ATR)
+        self._resume_point: tuple[EngineState, float, float] | None = None
+
         if params:
             self._set_params(params)
 
@@ -51,6 +63,20 @@ class TransactionProfit:
 
         self._stop_profit_prepared = False  # 是否已准备止盈
 
+    def _get_state(self):
+        return EngineState(tuple(self._positions), self._enter_type, self._enter_price, self._enter_atr,
+                           self._current_profit, self._max_profit, self._stop_profit_prepared)
+
+    def _set_state(self, state: EngineState):
+        self._clear_all()
+        self._positions.extend(state.positions)
+        self._enter_type = state.enter_type
+        self._enter_price = state.enter_price
+        self._enter_atr = state.enter_atr
+        self._current_profit = state.current_profit
+        self._max_profit = state.max_profit
+        self._stop_profit_prepared = state.stop_profit_prepared
+
     @property
     def _last_open_price(self):
         """
@@ -227,11 +253,10 @@ class TransactionProfit:
 
     # noinspection PyPep8Naming
     def _calculate_min_max(self, T: int):
-        # 设置滑动窗口大小
-        self._high_window.window = T
-        self._low_window.window = T
         # 计算前T日最高价和最低价
-        return self._high_window.max(), self._low_window.min()
+        input_data = self._input
+        return (input_data[HIGH].rolling(window=T, closed='left').max(),
+                input_data[LOW].rolling(window=T, closed='left').min())
 
     # noinspection PyPep8Naming
     def _calculate_atr(self, T: int, M: int):
@@ -251,22 +276,42 @@ class TransactionProfit:
         high_max, low_min = self._calculate_min_max(params.T)
         # 计算前T日ATR
         atr = self._calculate_atr(params.T, params.M)
-        # 插入数据
-        input_data = self._input
-        input_data[HIGH_MAX] = high_max
-        input_data[LOW_MIN] = low_min
-        input_data[ATR] = atr
+        # 不修改共享的输入数据
+        self._indicators = (high_max.tolist(), low_min.tolist(), atr.tolist())
 
     def with_params(self, params: TransactionParams):
         self._set_params(params)
         return self
 
-    def transact(self):
+    def transact(self, snapshot: Snapshot | None = None):
+        """
+        计算最后一次离市利润
+        :param snapshot: 上一次计算的快照，参数相同且数据前缀未改变时只计算此后的数据
+        :return: 最后一次离市利润
+        """
         assert self._params is not None, 'No parameters'
-        last_profit = 0.0
+        last_index = self._last_index
+        self._resume_point = None
+        if can_resume(snapshot, TransactionProfit.__name__, self._params, self._input):
+            start = snapshot.resume_index
+            indicators = resume_indicators(snapshot, self._input)
+            self._set_state(snapshot.state)
+            last_profit = snapshot.last_profit
+            last_atr = snapshot.last_atr
+        else:
+            start = self._params.T
+            indicators = tuple(indicator[start:] for indicator in self._indicators)
+            self._clear_all()
+            last_profit = 0.0
+            last_atr = math.nan
         for index, _, open_price, close_price, \
-                high, low, tr, high_max, low_min, atr in (
-                self._input[self._params.T:].itertuples(name=None)):
+                high, low, tr, high_max, low_min, atr in zip(
+                range(start, last_index + 1),
+                *(column[start:] for column in self._columns),
+                *indicators):
+            if index == last_index:
+                self._resume_point = (self._get_state(), last_profit, last_atr)
+            last_atr = atr
             self._enter(high, low, high_max, low_min, atr)
             self._add_position(high, low, atr)
             self._calculate_profit(close_price)
@@ -277,3 +322,14 @@ class TransactionProfit:
                 last_profit = self._current_profit
                 self._clear_all()
         return last_profit
+
+    def snapshot(self):
+        """
+        获取上一次transact的快照，用于数据追加后继续计算
+        :return: 快照，未计算最后一日或数据不足以继续计算时返回None
+        """
+        if self._resume_point is None:
+            return None
+        state, last_profit, last_atr = self._resume_point
+        return create_snapshot(TransactionProfit.__name__, self._params, self._input, self._last_index, state,
+                               last_atr, last_profit)
@@ -9,21 +9,45 @@ USE_COLUMNS = (DATE, OPEN, CLOSE, LOW, HIGH, TR)
 DATA_DIR = pathlib.Path(__file__).parent
 DATA_FILE = DATA_DIR / 'data.xlsx'
 OUTPUT_FILE = DATA_DIR / 'output.xlsx'
+BATCH_OUTPUT_FILE = DATA_DIR / 'batch_output.xlsx'
 
 DATE_TIME_FORMAT = 'YYYY-MM-DD'
+SHEET_NAME = 'Sheet1'
 
 
-def load_data():
+def load_data(file: str | pathlib.Path = DATA_FILE):
     # noinspection PyTypeChecker
-    return pd.read_excel(DATA_FILE, usecols=USE_COLUMNS).dropna(axis=0, subset=(DATE,))
-
-
-def save_data(output: pd.DataFrame):
-    with pd.ExcelWriter(OUTPUT_FILE, datetime_format=DATE_TIME_FORMAT) as writer:
-        # https://github.com/pandas-dev/pandas/issues/44284
-        try:
-            writer._datetime_format = DATE_TIME_FORMAT
-        except AttributeError as e:
-            print('AttributeError occurred')
-            traceback.print_exception(e)
-        output.to_excel(writer, index=False)
+    return pd.read_excel(file, usecols=USE_COLUMNS).dropna(axis=0, subset=(DATE,))
+
+
+def _set_datetime_format(writer: pd.ExcelWriter):
+    # https://github.com/pandas-dev/pandas/issues/44284
+    try:
+        writer._datetime_format = DATE_TIME_FORMAT
+    except AttributeError as e:
+        print('AttributeError occurred')
+        traceback.print_exception(e)
+
+
+def save_sheets(sheets: dict[str, pd.DataFrame], file: str | pathlib.Path):
+    with pd.ExcelWriter(file, datetime_format=DATE_TIME_FORMAT) as writer:
+        _set_datetime_format(writer)
+        for sheet_name, output in sheets.items():
+            output.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def save_data(output: pd.DataFrame, file: str | pathlib.Path = OUTPUT_FILE):
+    save_sheets({SHEET_NAME: output}, file)
+
+
+def append_data(output: pd.DataFrame, file: str | pathlib.Path = OUTPUT_FILE):
+    """
+    把每日信息写入已有的输出文件，从output的第一个下标对应的行开始覆盖
+    :param output: 每日信息表（下标为在表格中的行号）
+    :param file: 输出文件
+    :return:
+    """
+    with pd.ExcelWriter(file, mode='a', if_sheet_exists='overlay', datetime_format=DATE_TIME_FORMAT) as writer:
+        _set_datetime_format(writer)
+        # 第一行为表头
+        output.to_excel(writer, sheet_name=SHEET_NAME, startrow=output.index[0] + 1, header=False, index=False)
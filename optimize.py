@@ -1,84 +1,203 @@
+import math
 import os
-import pathlib
-from concurrent.futures import ProcessPoolExecutor
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 
+import pandas as pd
 from nevergrad.optimization.optimizerlib import DifferentialEvolution
 from nevergrad.parametrization.parameter import Instrumentation
 from numpy.random import RandomState
 
 from core.transaction_profit import TransactionProfit
 from data.data_io import load_data
-from util.optimize_params import OPTIMIZE_PARAMS
-from util.param_logger import ParamLogger
+from remote.executor import RemoteExecutor
+from remote.protocol import BATCH_SIZE
+from util.early_stopping import StagnationStopper, StopReason
+from util.optimize_params import OPTIMIZE_PARAMS, OptimizeParams
+from util.param_logger import LOG_FILE, ParamLogger
 from util.parameter import Integer, Real
+from util.search_space import ConstraintCounter, SearchSpace
+from util.surrogate import SurrogateExecutor
+from util.top_params import TopParams
 from util.transaction_params import TransactionParams
 
 
 class Worker:
-    # Each worker process has its own copy of this variable
-    transaction: TransactionProfit
+    # Each worker process has its own copy of these variables,
+    # while worker threads share the read-only input data
+    input_data: pd.DataFrame
+    to_params = TransactionParams
+    # Per-thread TransactionProfit, which holds the indicators and state of one evaluation
+    _local = threading.local()
 
     @classmethod
-    def initializer(cls):
+    def initializer(cls, input_data: pd.DataFrame | None = None, to_params=TransactionParams):
         # This function will be executed ONCE per worker process
         # So pickling overhead is minimized
-        cls.transaction = TransactionProfit()
+        cls.input_data = load_data() if input_data is None else input_data
+        cls.to_params = to_params
 
     @classmethod
-    def objective_function(cls, *args):
-        return -cls.transaction.with_params(TransactionParams(*args)).transact()
-
-
-if __name__ == '__main__':
-    length = len(load_data())
+    def transaction(cls) -> TransactionProfit:
+        transaction = getattr(cls._local, 'transaction', None)
+        if transaction is None:
+            transaction = cls._local.transaction = TransactionProfit(input_data=cls.input_data)
+        return transaction
 
+    @classmethod
+    def objective_function(cls, *args):
+        return -cls.transaction().with_params(cls.to_params(*args)).transact()
+
+
+def create_executor(executor_type: str, num_workers: int, input_data: pd.DataFrame,
+                    to_params=TransactionParams) -> Executor:
+    if executor_type == 'thread':
+        # No pickling, all threads evaluate on the same data (fastest on free-threaded builds)
+        Worker.initializer(input_data, to_params)
+        return ThreadPoolExecutor(num_workers)
+    return ProcessPoolExecutor(num_workers, initializer=Worker.initializer, initargs=(input_data, to_params))
+
+
+def create_parametrization(space: SearchSpace, legacy_space: bool):
+    length = space.length
+    if legacy_space:
+        def constraint_function(args):
+            x = args[0]
+            # T + M <= length - 1 and R <= length - T
+            return x[0] + x[1] <= length - 1 and x[0] + x[2] <= length
+
+        # Parameter ranges
+        parameters = Instrumentation(
+            Integer('T', 1, length - 1),
+            Integer('M', 1, length),
+            Integer('R', 1, length),
+            Real('N', 0),
+            Real('K', 0),
+            Real('P', 0),
+            Real('Q', 0, 1),
+        ).set_name(TransactionParams.__name__)
+        return parameters, TransactionParams, constraint_function
 
     def constraint_function(args):
-        x = args[0]
-        # T + M <= length - 1 and R <= length - T
-        return x[0] + x[1] <= length - 1 and x[0] + x[2] <= length
-
+        # Always satisfied, only counted to compare with the legacy space
+        return space.is_feasible(space.to_params(*args[0]))
 
-    # Parameter ranges
+    # M and R are fractions of the remaining length after T, so the constraints hold by construction
     parameters = Instrumentation(
-        Integer('T', 1, length - 1),
-        Integer('M', 1, length),
-        Integer('R', 1, length),
+        Integer('T', 1, length - 2),
+        Real('M', 0, 1),
+        Real('R', 0, 1),
         Real('N', 0),
         Real('K', 0),
         Real('P', 0),
         Real('Q', 0, 1),
-    ).set_name(TransactionParams.__name__)
+    ).set_name(SearchSpace.__name__)
+    return parameters, space.to_params, constraint_function
+
+
+def perturb(parameters: Instrumentation, args: tuple, count: int):
+    # Random mutations of args, used as the initial population of a restart
+    for _ in range(count):
+        child = parameters.spawn_child(new_value=(args, {}))
+        child.mutate()
+        yield child.args
+
+
+def optimize(optimize_params: OptimizeParams = OPTIMIZE_PARAMS, input_data: pd.DataFrame | None = None,
+             listen: tuple[str, int] | None = None, num_workers: int | None = None,
+             batch_size: int = BATCH_SIZE, surrogate: bool = False, legacy_space: bool = False,
+             executor_type: str = 'process'):
+    if input_data is None:
+        input_data = load_data()
+    space = SearchSpace(len(input_data))
+    _, to_params, constraint_function = create_parametrization(space, legacy_space)
+    print(f'legacy space: {space.box_rejection_rate(seed=optimize_params.seed):.1%} of the box is infeasible')
     # Constraints
-    parameters.register_cheap_constraint(constraint_function)
-
-    # Set global random seed to produce deterministic results
-    parameters.random_state = RandomState(OPTIMIZE_PARAMS.seed)
-
-    num_workers = min(os.cpu_count() or 1, 1)  # At least one
+    constraint_counter = ConstraintCounter(constraint_function)
+
+    if listen:
+        # Keep every remote worker busy with one batch
+        num_workers = (num_workers or 1) * batch_size
+        executor = RemoteExecutor(*listen, input_data, batch_size=batch_size, to_params=to_params)
+    else:
+        num_workers = num_workers or min(os.cpu_count() or 1, 1)  # At least one
+        executor = create_executor(executor_type, num_workers, input_data, to_params)
+    if surrogate:
+        executor = SurrogateExecutor(executor, seed=optimize_params.seed)
     CustomDE = DifferentialEvolution(
         crossover='twopoints',  # noqa
         high_speed=True,
         popsize='large',
         propagate_heritage=True,
     )
-    optimizer = CustomDE(
-        budget=OPTIMIZE_PARAMS.iteration_count,
-        num_workers=num_workers,
-        parametrization=parameters,
-    )
-
-    initial_x = OPTIMIZE_PARAMS.initial_x
-    if initial_x:
-        optimizer.suggest(*initial_x)
 
-    with open(pathlib.Path(__file__).parent / 'params.log', 'w', encoding='utf-8') as f:
-        optimizer.register_callback('tell', ParamLogger(f))
-        with ProcessPoolExecutor(num_workers, initializer=Worker.initializer) as executor:
+    max_time = optimize_params.max_time
+    deadline = None if max_time is None else time.monotonic() + max_time
+    remaining_budget = optimize_params.iteration_count
+    best_args, best_loss = None, math.inf
+
+    with open(LOG_FILE, 'w', encoding='utf-8') as f, executor:
+        param_logger = ParamLogger(f, to_params)
+        # The log only records improvements, the best distinct candidates are kept separately for batch-report
+        top_params = TopParams(to_params=to_params)
+        for restart in range(optimize_params.max_restarts + 1):
+            parameters, _, _ = create_parametrization(space, legacy_space)
+            parameters.register_cheap_constraint(constraint_counter)
+            # Set global random seed to produce deterministic results, and a new one for every restart
+            parameters.random_state = RandomState(optimize_params.seed + restart)
+
+            optimizer = CustomDE(
+                budget=remaining_budget,
+                num_workers=num_workers,
+                parametrization=parameters,
+            )
+            if restart == 0:
+                initial_x = optimize_params.initial_x
+                if initial_x:
+                    if not legacy_space:
+                        initial_x = space.from_params(TransactionParams(*initial_x))
+                    optimizer.suggest(*initial_x)
+            elif best_args is not None:
+                # Restart around the best candidate so far
+                optimizer.suggest(*best_args)
+                for args in perturb(parameters, best_args, optimize_params.restart_population):
+                    optimizer.suggest(*args)
+
+            stopper = StagnationStopper(optimize_params.stagnation_window, optimize_params.stagnation_threshold,
+                                        optimize_params.stagnation_patience, deadline)
+            optimizer.register_callback('tell', param_logger)
+            optimizer.register_callback('tell', top_params)
+            optimizer.register_callback('tell', stopper.tell)
+            optimizer.register_callback('ask', stopper.ask)
             # noinspection PyTypeChecker
-            result = optimizer.minimize(
+            optimizer.minimize(
                 Worker.objective_function,
                 batch_mode=False,
                 executor=executor,
             )
-            print(result.args, result.loss)
+            remaining_budget -= stopper.evaluations
+            if stopper.best_loss < best_loss:
+                best_args, best_loss = stopper.best_args, stopper.best_loss
+            print(f'run {restart}: {stopper.reason} after {stopper.evaluations} evaluations, '
+                  f'best loss: {stopper.best_loss}')
+            if stopper.reason != StopReason.Stagnation or remaining_budget <= 0:
+                break
+        top_params.write()
+    print(constraint_counter.summary())
+    if surrogate:
+        print(executor.summary())
+    if best_args is None:
+        # The deadline passed before any result was reported back
+        print('no candidate was evaluated')
+        return None
+    print(to_params(*best_args), best_loss)
+    return to_params(*best_args), best_loss
+
+
+if __name__ == '__main__':
+    import sys
+
+    from cli import main
+
+    main(['optimize', *sys.argv[1:]])
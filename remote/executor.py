@@ -0,0 +1,181 @@
+import collections
+import itertools
+import socket
+import threading
+from concurrent.futures import CancelledError, Executor, Future
+
+import pandas as pd
+
+from data.data_io import load_data
+from remote.protocol import (BATCH_SIZE, HEARTBEAT_TIMEOUT, MAX_ATTEMPTS, MessageType, RemoteError, recv_message,
+                             send_message)
+from util.transaction_params import TransactionParams
+
+
+class RemoteExecutor(Executor):
+    """
+    协调节点：监听工作节点的连接，把提交的参数分批发送给空闲的工作节点计算损失。
+    工作节点掉线（连接断开、心跳超时或发送了无法处理的消息）时，其未完成的批次会重新分配给其他工作节点，
+    分配max_attempts次仍未完成的参数以RemoteError结束；工作节点计算批次出错时，该批次直接以RemoteError结束。
+    """
+
+    def __init__(self, host: str, port: int, input_data: pd.DataFrame | None = None,
+                 batch_size: int = BATCH_SIZE, heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+                 to_params=TransactionParams, max_attempts: int = MAX_ATTEMPTS):
+        """
+        :param host: 监听主机
+        :param port: 监听端口，为0时由系统分配（见address属性）
+        :param input_data: 发送给没有本地数据的工作节点的数据，为None时加载默认数据文件
+        :param batch_size: 每个批次最多包含的参数组数
+        :param heartbeat_timeout: 心跳超时时间（秒）
+        :param to_params: 把submit的参数转换为TransactionParams的函数
+        :param max_attempts: 每组参数最多分配的次数
+        """
+        self._input_data = load_data() if input_data is None else input_data
+        self._batch_size = batch_size
+        self._heartbeat_timeout = heartbeat_timeout
+        self._to_params = to_params
+        self._max_attempts = max_attempts
+
+        self._pending: collections.deque[tuple[Future, TransactionParams]] = collections.deque()
+        self._attempts: dict[Future, int] = {}  # 已重新分配过的Future的失败次数
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._batch_ids = itertools.count()
+        self._threads: list[threading.Thread] = []
+
+        self._server = socket.create_server((host, port))
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self._server.getsockname()[:2]
+
+    def submit(self, fn, /, *args, **kwargs):
+        # 工作节点上的目标函数固定为TransactionProfit的利润相反数，因此只需要发送参数
+        future = Future()
+        params = self._to_params(*args, **kwargs)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            self._pending.append((future, params))
+            self._condition.notify()
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                while self._pending:
+                    future, _ = self._pending.popleft()
+                    self._attempts.pop(future, None)
+                    if not future.cancel():
+                        # 重新分配的Future已处于运行状态，无法取消
+                        future.set_exception(CancelledError())
+            self._condition.notify_all()
+            threads = list(self._threads)
+        self._server.close()
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                # 监听套接字已关闭
+                return
+            with self._condition:
+                if self._shutdown:
+                    sock.close()
+                    return
+                thread = threading.Thread(target=self._serve, args=(sock,), daemon=True)
+                self._threads.append(thread)
+            thread.start()
+
+    def _take_batch(self):
+        """
+        取出一个批次，没有待计算的参数时阻塞
+        :return: 批次，已关闭且没有待计算的参数时返回None
+        """
+        with self._condition:
+            while not self._pending:
+                if self._shutdown:
+                    return None
+                self._condition.wait()
+            batch = []
+            while self._pending and len(batch) < self._batch_size:
+                future, params = self._pending.popleft()
+                # 重新分配的Future已处于运行状态
+                if future.running() or future.set_running_or_notify_cancel():
+                    batch.append((future, params))
+            return batch
+
+    def _requeue(self, batch: list[tuple[Future, TransactionParams]], error: BaseException):
+        requeued = []
+        with self._condition:
+            for future, params in batch:
+                if future.done():
+                    continue
+                attempts = self._attempts.pop(future, 0) + 1
+                if attempts >= self._max_attempts:
+                    future.set_exception(RemoteError(f'Failed after {attempts} attempts: {error!r}'))
+                else:
+                    self._attempts[future] = attempts
+                    requeued.append((future, params))
+            # 放回队首，优先重新分配
+            self._pending.extendleft(reversed(requeued))
+            self._condition.notify(len(requeued))
+
+    def _finish(self, batch: list[tuple[Future, TransactionParams]], losses: list[float]):
+        with self._condition:
+            for future, _ in batch:
+                self._attempts.pop(future, None)
+        for (future, _), loss in zip(batch, losses):
+            future.set_result(loss)
+
+    def _fail(self, batch: list[tuple[Future, TransactionParams]], message: str):
+        # 计算出错的参数在其他工作节点上也会出错，不再重新分配
+        with self._condition:
+            for future, _ in batch:
+                self._attempts.pop(future, None)
+        for future, _ in batch:
+            future.set_exception(RemoteError(message))
+
+    def _serve(self, sock: socket.socket):
+        batch = []
+        peer = sock.getpeername()
+        try:
+            with sock:
+                sock.settimeout(self._heartbeat_timeout)
+                message_type, need_data = recv_message(sock)
+                assert message_type == MessageType.Hello, f'Unexpected message: {message_type}'
+                if need_data:
+                    send_message(sock, MessageType.Data, self._input_data)
+                print(f'Worker {peer} connected')
+                while (batch := self._take_batch()) is not None:
+                    if not batch:
+                        continue
+                    batch_id = next(self._batch_ids)
+                    send_message(sock, MessageType.Batch, (batch_id, [params for _, params in batch]))
+                    while True:
+                        # 每次收到心跳都会重新计时，超时抛出socket.timeout(OSError)
+                        message_type, payload = recv_message(sock)
+                        if message_type in (MessageType.Result, MessageType.Error) and payload[0] == batch_id:
+                            break
+                    if message_type == MessageType.Error:
+                        print(f'Worker {peer} failed on batch {batch_id}:\n{payload[1]}')
+                        self._fail(batch, payload[1])
+                    else:
+                        losses = payload[1]
+                        if len(losses) != len(batch):
+                            raise ValueError(f'Expected {len(batch)} losses, got {len(losses)}')
+                        self._finish(batch, losses)
+                    batch = []
+                send_message(sock, MessageType.Shutdown)
+        except Exception as e:
+            # 包括连接断开、心跳超时以及无法解析的消息，批次交给其他工作节点
+            print(f'Worker {peer} dropped: {e!r}')
+            self._requeue(batch, e)
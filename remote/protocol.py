@@ -0,0 +1,70 @@
+import enum
+import pickle
+import socket
+import struct
+
+HEARTBEAT_INTERVAL = 5.0  # 工作节点发送心跳的间隔（秒）
+HEARTBEAT_TIMEOUT = 30.0  # 协调节点判定工作节点掉线的超时时间（秒）
+BATCH_SIZE = 16  # 每个批次最多包含的参数组数
+MAX_ATTEMPTS = 3  # 每个批次最多分配的次数，超过后其中的Future以异常结束
+
+# 消息头：消息类型(1字节) + 消息体长度(4字节，网络字节序)
+_HEADER = struct.Struct('!BI')
+
+
+class MessageType(enum.IntEnum):
+    Hello = 0  # 工作节点 -> 协调节点：是否需要协调节点发送数据
+    Data = 1  # 协调节点 -> 工作节点：输入数据
+    Batch = 2  # 协调节点 -> 工作节点：(批次编号, TransactionParams列表)
+    Result = 3  # 工作节点 -> 协调节点：(批次编号, 损失列表)
+    Heartbeat = 4  # 工作节点 -> 协调节点：心跳
+    Shutdown = 5  # 协调节点 -> 工作节点：退出
+    Error = 6  # 工作节点 -> 协调节点：(批次编号, 计算批次时发生的异常)
+
+
+class RemoteError(Exception):
+    """
+    工作节点计算批次时发生的异常，或批次多次分配都未能完成
+    """
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """
+    解析HOST:PORT格式的地址
+    :param address: 地址字符串
+    :return: (主机, 端口)
+    """
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def send_message(sock: socket.socket, message_type: MessageType, payload=None):
+    """
+    发送一条消息（消息体使用pickle序列化，只能在可信网络中使用）
+    :param sock: 套接字
+    :param message_type: 消息类型
+    :param payload: 消息体
+    :return:
+    """
+    body = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(message_type, len(body)) + body)
+
+
+def _recv_exact(sock: socket.socket, size: int):
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise EOFError('Connection closed')
+        buffer += chunk
+    return buffer
+
+
+def recv_message(sock: socket.socket):
+    """
+    接收一条消息
+    :param sock: 套接字
+    :return: (消息类型, 消息体)
+    """
+    message_type, size = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return MessageType(message_type), pickle.loads(_recv_exact(sock, size))
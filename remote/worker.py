@@ -0,0 +1,108 @@
+import pathlib
+import socket
+import threading
+import time
+import traceback
+
+import pandas as pd
+
+from core.transaction_profit import TransactionProfit
+from data.data_io import load_data
+from remote.protocol import HEARTBEAT_INTERVAL, MessageType, recv_message, send_message
+
+RETRY_INTERVAL = 1.0  # 连接协调节点失败后的重试间隔（秒）
+
+
+class _Heartbeat(threading.Thread):
+    def __init__(self, sock: socket.socket, lock: threading.Lock, interval: float):
+        super().__init__(daemon=True)
+        self._sock = sock
+        self._lock = lock
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        # 计算批次时主线程不会读写套接字，由心跳线程告知协调节点本节点仍然存活
+        while not self._stopped.wait(self._interval):
+            try:
+                with self._lock:
+                    send_message(self._sock, MessageType.Heartbeat)
+            except OSError:
+                return
+
+    def stop(self):
+        self._stopped.set()
+
+
+def _connect(host: str, port: int, retry_interval: float):
+    while True:
+        try:
+            return socket.create_connection((host, port))
+        except OSError:
+            time.sleep(retry_interval)
+
+
+def _session(sock: socket.socket, input_data: pd.DataFrame | None,
+             data_file: str | pathlib.Path | None, heartbeat_interval: float):
+    """
+    处理一次连接
+    :return: (输入数据, 是否收到退出消息)
+    """
+    need_data = input_data is None and data_file is None
+    try:
+        send_message(sock, MessageType.Hello, need_data)
+        if need_data:
+            message_type, input_data = recv_message(sock)
+            assert message_type == MessageType.Data, f'Unexpected message: {message_type}'
+    except (OSError, EOFError):
+        # 握手期间协调节点断开，重连
+        return input_data, False
+    if input_data is None:
+        input_data = load_data(data_file)
+    transaction = TransactionProfit(input_data=input_data)
+
+    lock = threading.Lock()
+    heartbeat = _Heartbeat(sock, lock, heartbeat_interval)
+    heartbeat.start()
+    try:
+        while True:
+            message_type, payload = recv_message(sock)
+            if message_type == MessageType.Shutdown:
+                return input_data, True
+            assert message_type == MessageType.Batch, f'Unexpected message: {message_type}'
+            batch_id, batch = payload
+            try:
+                # 与optimize.Worker.objective_function一致：最小化利润的相反数
+                losses = [-transaction.with_params(params).transact() for params in batch]
+            except Exception:
+                # 计算出错时告知协调节点，而不是退出（否则该批次会被重新分配并使每个工作节点依次退出）
+                with lock:
+                    send_message(sock, MessageType.Error, (batch_id, traceback.format_exc()))
+                continue
+            with lock:
+                send_message(sock, MessageType.Result, (batch_id, losses))
+    except (OSError, EOFError):
+        return input_data, False
+    finally:
+        heartbeat.stop()
+
+
+def serve(host: str, port: int, data_file: str | pathlib.Path | None = None,
+          heartbeat_interval: float = HEARTBEAT_INTERVAL, retry_interval: float = RETRY_INTERVAL):
+    """
+    连接协调节点并计算其分配的参数批次，连接断开后自动重连，直到收到退出消息
+    :param host: 协调节点主机
+    :param port: 协调节点端口
+    :param data_file: 本地数据文件，为None时由协调节点发送数据
+    :param heartbeat_interval: 心跳间隔（秒）
+    :param retry_interval: 重连间隔（秒）
+    :return:
+    """
+    # 数据只加载一次，重连后复用
+    input_data = None
+    while True:
+        with _connect(host, port, retry_interval) as sock:
+            input_data, shutdown = _session(sock, input_data, data_file, heartbeat_interval)
+        if shutdown:
+            return
+        time.sleep(retry_interval)
@@ -1,4 +1,3 @@
-from core.transaction_profit import TransactionProfit
-from util.constants import TRANSACTION_PARAMS
+from cli import main
 
-print(TransactionProfit(TRANSACTION_PARAMS).transact())
+main(['profit'])
@@ -0,0 +1,12 @@
+import argparse
+
+from remote.protocol import HEARTBEAT_INTERVAL, parse_address
+from remote.worker import serve
+
+parser = argparse.ArgumentParser(description='连接optimize.py的协调节点并计算其分配的参数')
+parser.add_argument('coordinator', type=parse_address, help='协调节点地址(HOST:PORT)')
+parser.add_argument('--data', default=None, help='本地数据文件，不指定时由协调节点发送数据')
+parser.add_argument('--heartbeat', type=float, default=HEARTBEAT_INTERVAL, help='心跳间隔（秒）')
+args = parser.parse_args()
+
+serve(*args.coordinator, data_file=args.data, heartbeat_interval=args.heartbeat)
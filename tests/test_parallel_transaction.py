@@ -0,0 +1,44 @@
+import unittest
+import warnings
+
+import pandas as pd
+
+from core.parallel_transaction import parallel_transact, split_segments
+from core.transaction import Transaction, create_output
+from data.data_io import load_data
+from util.constants import TRANSACTION_PARAMS
+from util.transaction_params import TransactionParams
+
+PARAMS_LIST = (
+    TRANSACTION_PARAMS,
+    TransactionParams(30, 7, 4, 0.5, 2.0, 3.0, 0.5),
+    TransactionParams(5, 60, 2, 1.5, 1.0, 8.0, 0.2),
+    TransactionParams(120, 15, 8, 0.1, 4.0, 1.0, 0.9),
+)
+SEGMENT_COUNTS = (1, 5, 37, 200)
+ROW_COUNT = 1200  # 逐行写入每日信息表较慢，只使用前面的数据
+
+
+class ParallelTransactionTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.input_data = load_data().iloc[:ROW_COUNT]
+
+    def test_split_segments(self):
+        self.assertEqual(split_segments(3, 13, 4), [(3, 5), (5, 8), (8, 10), (10, 13)])
+        # 段数不超过行数
+        self.assertEqual(split_segments(3, 5, 10), [(3, 4), (4, 5)])
+
+    def test_matches_sequential(self):
+        for params in PARAMS_LIST:
+            expected = create_output()
+            Transaction(self.input_data, expected, params).transact()
+            for segment_count in SEGMENT_COUNTS:
+                with self.subTest(params=params, segment_count=segment_count), warnings.catch_warnings():
+                    warnings.simplefilter('error', FutureWarning)
+                    output = parallel_transact(self.input_data, params, num_workers=2, segment_count=segment_count)
+                    pd.testing.assert_frame_equal(output, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import dataclasses
+import multiprocessing
+import random
+import socket
+import threading
+import unittest
+
+from core.transaction_profit import TransactionProfit
+from data.data_io import load_data
+from remote.executor import RemoteExecutor
+from remote.protocol import MessageType, RemoteError, recv_message, send_message
+from remote.worker import serve
+from util.transaction_params import TransactionParams
+
+HOST = '127.0.0.1'
+WORKER_COUNT = 3
+CANDIDATE_COUNT = 300
+
+
+def bad_worker(host: str, port: int, sessions: int):
+    """
+    每次连接都返回长度错误的结果
+    """
+    for _ in range(sessions):
+        with socket.create_connection((host, port)) as sock:
+            send_message(sock, MessageType.Hello, False)
+            message_type, (batch_id, _) = recv_message(sock)
+            if message_type != MessageType.Batch:
+                return
+            send_message(sock, MessageType.Result, (batch_id, []))
+            try:
+                # 等待协调节点断开连接
+                recv_message(sock)
+            except (OSError, EOFError):
+                pass
+
+
+def random_params(length: int, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    params_list = []
+    for _ in range(count):
+        T = rng.randint(1, 200)
+        M = rng.randint(1, min(200, length - 1 - T))
+        params_list.append(TransactionParams(
+            T, M, rng.randint(1, 10), rng.uniform(0, 3), rng.uniform(0, 5), rng.uniform(0, 10), rng.random()
+        ))
+    return params_list
+
+
+class RemoteExecutorTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.input_data = load_data()
+        cls.params_list = random_params(len(cls.input_data), CANDIDATE_COUNT)
+        transaction = TransactionProfit(input_data=cls.input_data)
+        cls.expected = [-transaction.with_params(params).transact() for params in cls.params_list]
+
+    def test_dropped_worker(self):
+        executor = RemoteExecutor(HOST, 0, self.input_data, batch_size=4)
+        host, port = executor.address
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=serve, args=(host, port), kwargs={'retry_interval': 0.1})
+                   for _ in range(WORKER_COUNT)]
+        for worker in workers:
+            worker.start()
+        try:
+            with executor:
+                futures = [executor.submit(None, *dataclasses.astuple(params)) for params in self.params_list]
+                # 第一个批次完成后杀死一个工作节点，此时它通常正在计算下一个批次
+                futures[0].result(timeout=120)
+                workers[0].kill()
+                losses = [future.result(timeout=120) for future in futures]
+            self.assertEqual(losses, self.expected)
+        finally:
+            for worker in workers:
+                worker.join(timeout=30)
+                if worker.is_alive():
+                    worker.kill()
+        # 被杀死的工作节点之外的节点都收到退出消息后正常退出
+        self.assertEqual([worker.exitcode for worker in workers[1:]], [0] * (WORKER_COUNT - 1))
+
+    def test_worker_error(self):
+        # M=0时计算ATR会除以0
+        bad_params = dataclasses.replace(self.params_list[0], M=0)
+        with RemoteExecutor(HOST, 0, self.input_data, batch_size=1) as executor:
+            threading.Thread(target=serve, args=executor.address, daemon=True).start()
+            bad_future = executor.submit(None, *dataclasses.astuple(bad_params))
+            futures = [executor.submit(None, *dataclasses.astuple(params)) for params in self.params_list[:10]]
+            with self.assertRaises(RemoteError) as context:
+                bad_future.result(timeout=60)
+            self.assertIn('ZeroDivisionError', str(context.exception))
+            # 工作节点没有退出，继续计算其他参数
+            self.assertEqual([future.result(timeout=60) for future in futures], self.expected[:10])
+
+    def test_bad_peer(self):
+        with RemoteExecutor(HOST, 0, self.input_data, batch_size=4) as executor:
+            futures = [executor.submit(None, *dataclasses.astuple(params)) for params in self.params_list[:10]]
+            bad_worker(*executor.address, sessions=1)
+            threading.Thread(target=serve, args=executor.address, daemon=True).start()
+            self.assertEqual([future.result(timeout=60) for future in futures], self.expected[:10])
+
+    def test_max_attempts(self):
+        with RemoteExecutor(HOST, 0, self.input_data, batch_size=4, max_attempts=2) as executor:
+            futures = [executor.submit(None, *dataclasses.astuple(params)) for params in self.params_list[:4]]
+            bad_worker(*executor.address, sessions=2)
+            for future in futures:
+                with self.assertRaises(RemoteError):
+                    future.result(timeout=60)
+
+    def test_reconnect_after_handshake_drop(self):
+        with socket.create_server((HOST, 0)) as server:
+            host, port = server.getsockname()[:2]
+            threading.Thread(target=serve, args=(host, port), kwargs={'retry_interval': 0.1}, daemon=True).start()
+            server.settimeout(30)
+            # 协调节点在握手期间断开，工作节点应当重连而不是退出
+            sock, _ = server.accept()
+            sock.close()
+            sock, _ = server.accept()
+            sock.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
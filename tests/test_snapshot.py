@@ -0,0 +1,99 @@
+import dataclasses
+import pathlib
+import tempfile
+import unittest
+
+import pandas as pd
+
+from core.snapshot import can_resume
+from core.transaction import Transaction, create_output
+from core.transaction_profit import TransactionProfit
+from data.data_io import append_data, load_data, save_data
+from util.constants import TRANSACTION_PARAMS
+from util.transaction_params import TransactionParams
+
+PARAMS_LIST = (
+    TRANSACTION_PARAMS,
+    TransactionParams(30, 7, 4, 0.5, 2.0, 3.0, 0.5),
+    TransactionParams(5, 60, 2, 1.5, 1.0, 8.0, 0.2),
+    TransactionParams(120, 15, 8, 0.1, 4.0, 1.0, 0.9),
+)
+CUTS = (400, 1111, 1800, 2200)  # 第一次计算使用的行数
+TAIL = 37  # 第二次计算追加的行数
+
+
+class SnapshotTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.input_data = load_data()
+
+    def test_transaction_profit_resume(self):
+        for params in PARAMS_LIST:
+            expected = TransactionProfit(params, self.input_data).transact()
+            for cut in CUTS:
+                with self.subTest(params=params, cut=cut):
+                    snapshot = None
+                    # 先追加TAIL行，再追加其余的行
+                    for length in (cut, cut + TAIL, len(self.input_data)):
+                        transaction = TransactionProfit(params, self.input_data.iloc[:length])
+                        profit = transaction.transact(snapshot)
+                        snapshot = transaction.snapshot()
+                    self.assertIsNotNone(snapshot)
+                    self.assertEqual(profit, expected)
+
+    def test_transaction_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            expected_file = pathlib.Path(directory) / 'expected.xlsx'
+            output_file = pathlib.Path(directory) / 'output.xlsx'
+            for params in PARAMS_LIST[:2]:
+                output = create_output()
+                Transaction(self.input_data, output, params).transact()
+                save_data(output, expected_file)
+                expected = pd.read_excel(expected_file)
+                for cut in CUTS[1:3]:
+                    with self.subTest(params=params, cut=cut):
+                        output = create_output()
+                        transaction = Transaction(self.input_data.iloc[:cut], output, params)
+                        transaction.transact()
+                        save_data(output, output_file)
+                        snapshot = transaction.snapshot()
+                        for length in (cut + TAIL, len(self.input_data)):
+                            output = create_output()
+                            transaction = Transaction(self.input_data.iloc[:length], output, params, snapshot)
+                            transaction.transact()
+                            # 只计算并覆盖写入快照之后的行
+                            self.assertEqual(output.index[0], snapshot.resume_index - params.T)
+                            append_data(output, output_file)
+                            snapshot = transaction.snapshot()
+                        pd.testing.assert_frame_equal(pd.read_excel(output_file), expected)
+
+    def test_rejected_snapshots(self):
+        params = TRANSACTION_PARAMS
+        head = self.input_data.iloc[:CUTS[1]]
+        transaction_profit = TransactionProfit(params, head)
+        transaction_profit.transact()
+        profit_snapshot = transaction_profit.snapshot()
+        transaction = Transaction(head, create_output(), params)
+        transaction.transact()
+        report_snapshot = transaction.snapshot()
+
+        self.assertTrue(can_resume(profit_snapshot, TransactionProfit.__name__, params, self.input_data))
+        self.assertTrue(can_resume(report_snapshot, Transaction.__name__, params, self.input_data))
+        # 另一个引擎生成的快照
+        self.assertFalse(can_resume(report_snapshot, TransactionProfit.__name__, params, self.input_data))
+        self.assertFalse(can_resume(profit_snapshot, Transaction.__name__, params, self.input_data))
+        # 参数改变
+        changed_params = dataclasses.replace(params, Q=params.Q / 2)
+        self.assertFalse(can_resume(profit_snapshot, TransactionProfit.__name__, changed_params, self.input_data))
+        # 快照之前的数据改变
+        changed_data = self.input_data.copy()
+        changed_data.iloc[100, 1] += 1
+        self.assertFalse(can_resume(profit_snapshot, TransactionProfit.__name__, params, changed_data))
+
+        # 不能继续计算时完整计算
+        expected = TransactionProfit(params, self.input_data).transact()
+        self.assertEqual(TransactionProfit(params, self.input_data).transact(report_snapshot), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import time
+import unittest
+from concurrent.futures import Executor, Future
+
+import numpy as np
+
+from util.surrogate import KNeighbors, SurrogateExecutor
+
+SAMPLE_COUNT = 40
+# 预热结束后只拟合一次，避免测试过程中阈值改变
+WARMUP = SAMPLE_COUNT
+REFIT_INTERVAL = 1000
+
+
+def objective(x: float, y: float):
+    # 损失只取决于第一个参数
+    return x
+
+
+class CountingExecutor(Executor):
+    """
+    在调用线程中立即计算，并记录实际计算的参数
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, /, *args, **kwargs):
+        self.calls.append(args)
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def wait_for_model(surrogate: SurrogateExecutor, size: int) -> KNeighbors:
+    # 代理模型在后台线程中拟合
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        model, _ = surrogate._filter
+        if model is not None and len(model._y) == size:
+            return model
+        time.sleep(0.01)
+    raise TimeoutError('surrogate was not refit')
+
+
+class SurrogateExecutorTest(unittest.TestCase):
+    def create(self, audit_rate: float, fit_size: int = SAMPLE_COUNT):
+        executor = CountingExecutor()
+        surrogate = SurrogateExecutor(executor, warmup=WARMUP, neighbors=1, refit_interval=REFIT_INTERVAL,
+                                      fit_size=fit_size, quantile=0.5, audit_rate=audit_rate, seed=0)
+        self.addCleanup(surrogate.shutdown)
+        # 预热：损失均匀分布在[0, 1]，过滤阈值为中位数0.5
+        for x in np.linspace(0, 1, SAMPLE_COUNT):
+            self.assertEqual(surrogate.submit(objective, x, 0.0).result(), x)
+        return executor, surrogate
+
+    def test_skipped_futures_resolve_to_prediction(self):
+        executor, surrogate = self.create(audit_rate=0.0)
+        model = wait_for_model(surrogate, SAMPLE_COUNT)
+        self.assertEqual(len(executor.calls), SAMPLE_COUNT)
+
+        bad = [surrogate.submit(objective, x, 0.0) for x in (0.9, 0.95, 0.99)]
+        for future, x in zip(bad, (0.9, 0.95, 0.99)):
+            self.assertEqual(future.result(), model.predict(np.array([x, 0.0])))
+        good = [surrogate.submit(objective, x, 0.0) for x in (0.01, 0.1)]
+        self.assertEqual([future.result() for future in good], [0.01, 0.1])
+        # 只有预测为较好的候选参数被实际计算
+        self.assertEqual(executor.calls[SAMPLE_COUNT:], [(0.01, 0.0), (0.1, 0.0)])
+        self.assertIn(f'skipped 3/{SAMPLE_COUNT + 5} evaluations', surrogate.summary())
+        self.assertIn('wrongly passed 0/2', surrogate.summary())
+
+    def test_audits_reach_wrapped_executor(self):
+        executor, surrogate = self.create(audit_rate=1.0)
+        wait_for_model(surrogate, SAMPLE_COUNT)
+
+        # 抽样率为1时预测为较差的候选参数全部实际计算
+        losses = [surrogate.submit(objective, x, 0.0).result() for x in (0.9, 0.95, 0.99, 0.2)]
+        self.assertEqual(losses, [0.9, 0.95, 0.99, 0.2])
+        self.assertEqual(executor.calls[SAMPLE_COUNT:], [(0.9, 0.0), (0.95, 0.0), (0.99, 0.0), (0.2, 0.0)])
+        summary = surrogate.summary()
+        self.assertIn(f'skipped 0/{SAMPLE_COUNT + 4} evaluations', summary)
+        self.assertIn('wrongly passed 0/1', summary)
+        self.assertIn('wrongly rejected 0/3 audited', summary)
+
+    def test_fit_size_caps_model(self):
+        _, surrogate = self.create(audit_rate=0.0, fit_size=10)
+        model = wait_for_model(surrogate, 10)
+        self.assertEqual(len(model._y), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import enum
+import math
+import time
+import typing
+
+from nevergrad.common.errors import NevergradEarlyStopping
+
+if typing.TYPE_CHECKING:
+    from nevergrad.optimization import Optimizer
+    from nevergrad.parametrization.core import Parameter
+
+
+class StopReason(enum.StrEnum):
+    Budget = 'evaluation budget exhausted'
+    Timeout = 'wall-clock budget exhausted'
+    Stagnation = 'best loss stagnated'
+
+
+class StagnationStopper:
+    """
+    每window次计算统计一次最优损失的相对改进，连续patience个窗口的相对改进小于threshold时停止优化，
+    超过截止时间时也停止优化。tell方法注册为tell回调，ask方法注册为ask回调
+    """
+
+    def __init__(self, window: int, threshold: float, patience: int, deadline: float | None = None):
+        """
+        :param window: 窗口大小（计算次数）
+        :param threshold: 相对改进阈值
+        :param patience: 允许连续停滞的窗口数目
+        :param deadline: 截止时间（time.monotonic()），为None时不限制
+        """
+        self._window = window
+        self._threshold = threshold
+        self._patience = patience
+        self._deadline = deadline
+
+        self.evaluations = 0  # 已完成的计算次数
+        self.best_loss = math.inf  # 最优损失
+        self.best_args: tuple | None = None  # 最优候选参数
+        self.reason = StopReason.Budget  # 停止原因
+        self._window_start_loss = math.inf  # 当前窗口开始时的最优损失
+        self._stagnant_windows = 0  # 连续停滞的窗口数目
+
+    def tell(self, optimizer: 'Optimizer', candidate: 'Parameter', loss: float):
+        self.evaluations += 1
+        if loss < self.best_loss:
+            self.best_loss = loss
+            self.best_args = candidate.args
+        if self.evaluations % self._window:
+            return
+        start_loss = self._window_start_loss
+        # 损失可能为负数，因此相对于绝对值计算改进
+        if math.isinf(start_loss) or start_loss - self.best_loss > self._threshold * abs(start_loss):
+            self._stagnant_windows = 0
+        else:
+            self._stagnant_windows += 1
+        self._window_start_loss = self.best_loss
+
+    def ask(self, optimizer: 'Optimizer'):
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self.reason = StopReason.Timeout
+        elif self._stagnant_windows >= self._patience:
+            self.reason = StopReason.Stagnation
+        else:
+            return
+        raise NevergradEarlyStopping(self.reason)
@@ -6,6 +6,12 @@ class OptimizeParams:
     seed: int
     iteration_count: int
     initial_x: tuple[float, ...] | None
+    stagnation_window: int = 100000  # 统计最优损失改进的窗口大小（计算次数）
+    stagnation_threshold: float = 1e-6  # 窗口内最优损失的相对改进小于该值时视为停滞
+    stagnation_patience: int = 5  # 连续停滞的窗口数目达到该值时停止或重启
+    max_restarts: int = 0  # 停滞后最多重启的次数（使用新的随机数种子，在当前最优参数附近重新生成种群）
+    restart_population: int = 50  # 重启时在当前最优参数附近生成的候选参数数目
+    max_time: float | None = None  # 最长运行时间（秒），为None时不限制
 
 
 # 253895.63999999993
@@ -1,20 +1,28 @@
+import dataclasses
 import datetime
 import math
+import pathlib
 import typing
 
 import tqdm
 
-from nevergrad.optimization import Optimizer
-from nevergrad.parametrization.core import Parameter
+if typing.TYPE_CHECKING:
+    from nevergrad.optimization import Optimizer
+    from nevergrad.parametrization.core import Parameter
+
+from util.transaction_params import TransactionParams
+
+LOG_FILE = pathlib.Path(__file__).parent.parent / 'params.log'
 
 
 class ParamLogger:
-    def __init__(self, file: typing.IO):
+    def __init__(self, file: typing.IO, to_params=TransactionParams):
         self._min_loss = math.inf
         self._progress = None
         self._file = file
+        self._to_params = to_params  # 把候选参数转换为TransactionParams的函数
 
-    def __call__(self, optimizer: Optimizer, candidate: Parameter, loss: float):
+    def __call__(self, optimizer: 'Optimizer', candidate: 'Parameter', loss: float):
         progress = self._progress
         if progress is None:
             progress = self._progress = tqdm.tqdm(total=optimizer.budget)
@@ -24,6 +32,7 @@ class ParamLogger:
             min_loss_str = f'min loss: {min_loss}'
             progress.set_postfix_str(min_loss_str, refresh=False)
             self._file.write(f'[{datetime.datetime.now().isoformat(sep=' ')}]'
-                             f'{min_loss_str}, args: {candidate.args}\n')
+                             f'{min_loss_str}, args: {dataclasses.astuple(self._to_params(*candidate.args))}\n')
             self._file.flush()
         progress.update(1)
+
@@ -0,0 +1,88 @@
+import dataclasses
+
+import numpy as np
+
+from util.transaction_params import TransactionParams
+
+
+# noinspection PyPep8Naming
+@dataclasses.dataclass(eq=False, frozen=True)
+class SearchSpace:
+    """
+    保证T + M <= length - 1且T + R <= length的参数空间：
+    T的范围为[1, length - 2]，M和R表示为T之后剩余长度的比例（范围[0, 1]）
+    """
+    length: int  # 输入数据长度
+
+    def max_m(self, T: int):
+        return self.length - 1 - T
+
+    def max_r(self, T: int):
+        return self.length - T
+
+    def to_params(self, T: int, M: float, R: float, N: float, K: float, P: float, Q: float):
+        """
+        把参数空间中的点转换为交易参数
+        :return: 交易参数
+        """
+        T = int(T)
+        return TransactionParams(
+            T,
+            1 + round(M * (self.max_m(T) - 1)),
+            1 + round(R * (self.max_r(T) - 1)),
+            N, K, P, Q,
+        )
+
+    def from_params(self, params: TransactionParams):
+        """
+        把交易参数转换为参数空间中的点
+        :param params: 交易参数
+        :return: 参数空间中的点
+        """
+        T = params.T
+        max_m = self.max_m(T)
+        max_r = self.max_r(T)
+        return (
+            T,
+            (params.M - 1) / (max_m - 1) if max_m > 1 else 0.0,
+            (params.R - 1) / (max_r - 1) if max_r > 1 else 0.0,
+            params.N, params.K, params.P, params.Q,
+        )
+
+    def is_feasible(self, params: TransactionParams):
+        return (1 <= params.T and 1 <= params.M and 1 <= params.R and
+                params.T + params.M <= self.length - 1 and params.T + params.R <= self.length)
+
+    def box_rejection_rate(self, samples: int = 100000, seed: int | None = None):
+        """
+        估计原参数空间（T、M、R分别在[1, length - 1]、[1, length]、[1, length]中独立取值）中不满足约束的比例
+        :param samples: 采样数目
+        :param seed: 随机数种子
+        :return: 不满足约束的比例
+        """
+        random = np.random.default_rng(seed)
+        T = random.integers(1, self.length - 1, samples, endpoint=True)
+        M = random.integers(1, self.length, samples, endpoint=True)
+        R = random.integers(1, self.length, samples, endpoint=True)
+        return float(np.mean((T + M > self.length - 1) | (T + R > self.length)))
+
+
+class ConstraintCounter:
+    """
+    统计约束函数的检查次数和拒绝次数
+    """
+
+    def __init__(self, constraint):
+        self._constraint = constraint
+        self.checked = 0
+        self.rejected = 0
+
+    def __call__(self, *args, **kwargs):
+        feasible = self._constraint(*args, **kwargs)
+        self.checked += 1
+        self.rejected += not feasible
+        return feasible
+
+    def summary(self):
+        return (f'constraint: rejected {self.rejected}/{self.checked} proposals '
+                f'({self.rejected / max(self.checked, 1):.1%})')
@@ -0,0 +1,145 @@
+import collections
+import threading
+from concurrent.futures import Executor, Future
+
+import numpy as np
+
+
+class KNeighbors:
+    """
+    k近邻回归：按标准差归一化各参数后，取欧氏距离最近的k个样本损失的平均值
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, neighbors: int):
+        scale = x.std(axis=0)
+        scale[scale == 0] = 1.0
+        self._scale = scale
+        self._x = x / scale
+        self._y = y
+        self._neighbors = min(neighbors, len(y))
+
+    def predict(self, x: np.ndarray) -> float:
+        distances = np.square(self._x - x / self._scale).sum(axis=1)
+        nearest = np.argpartition(distances, self._neighbors - 1)[:self._neighbors]
+        return float(self._y[nearest].mean())
+
+
+class SurrogateExecutor(Executor):
+    """
+    在优化器和实际执行器之间，用代理模型预测候选参数的损失：
+    预测损失高于最近实际损失的分位数时，直接返回预测损失，只按audit_rate的概率抽样实际计算
+    """
+
+    def __init__(self, executor: Executor, warmup: int = 10000, neighbors: int = 8,
+                 refit_interval: int = 5000, history_size: int = 200000, fit_size: int = 2000,
+                 window: int = 5000, quantile: float = 0.75, audit_rate: float = 0.05, seed: int | None = None):
+        """
+        :param executor: 实际计算损失的执行器
+        :param warmup: 开始过滤前需要的实际计算次数
+        :param neighbors: 近邻数目
+        :param refit_interval: 每完成多少次实际计算后在后台重新拟合代理模型
+        :param history_size: 保留的最近样本数目
+        :param fit_size: 拟合代理模型时从保留的样本中随机抽取的数目（预测耗时与之成正比，需要远小于一次实际计算）
+        :param window: 计算过滤阈值使用的最近实际损失数目
+        :param quantile: 过滤阈值的分位数
+        :param audit_rate: 预测为较差的候选参数仍然实际计算的概率
+        :param seed: 抽样随机数种子
+        """
+        self._executor = executor
+        self._warmup = warmup
+        self._neighbors = neighbors
+        self._refit_interval = refit_interval
+        self._fit_size = fit_size
+        self._quantile = quantile
+        self._audit_rate = audit_rate
+        self._random = np.random.default_rng(seed)
+        self._fit_random = np.random.default_rng(seed)  # 只在后台线程中使用
+
+        self._lock = threading.Lock()
+        self._history: collections.deque[tuple[np.ndarray, float]] = collections.deque(maxlen=history_size)
+        self._recent_losses: collections.deque[float] = collections.deque(maxlen=window)
+        # (代理模型, 过滤阈值)，后台重新拟合后整体替换
+        self._filter: tuple[KNeighbors | None, float] = (None, np.inf)
+        self._since_refit = 0
+
+        self._submitted = 0  # 提交的候选参数数目
+        self._skipped = 0  # 使用预测损失、跳过实际计算的数目
+        self._passed = 0  # 预测为较好并实际计算的数目
+        self._false_passes = 0  # 预测为较好但实际损失高于阈值的数目
+        self._audited = 0  # 预测为较差但抽样实际计算的数目
+        self._false_rejects = 0  # 预测为较差但实际损失不高于阈值的数目
+
+        self._refit_requested = threading.Event()
+        self._stopped = False
+        self._refit_thread = threading.Thread(target=self._refit_loop, daemon=True)
+        self._refit_thread.start()
+
+    def submit(self, fn, /, *args, **kwargs):
+        x = np.array(args, dtype=float)
+        model, threshold = self._filter
+        predicted_loss = model.predict(x) if model is not None else -np.inf
+        rejected = predicted_loss > threshold
+        with self._lock:
+            self._submitted += 1
+            if rejected and self._random.random() >= self._audit_rate:
+                self._skipped += 1
+                future = Future()
+                future.set_result(predicted_loss)
+                return future
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda f: self._record(x, f, rejected, threshold))
+        return future
+
+    def _record(self, x: np.ndarray, future: Future, rejected: bool, threshold: float):
+        if future.cancelled() or future.exception() is not None:
+            return
+        loss = future.result()
+        with self._lock:
+            if rejected:
+                self._audited += 1
+                self._false_rejects += loss <= threshold
+            elif threshold < np.inf:
+                self._passed += 1
+                self._false_passes += loss > threshold
+            self._history.append((x, loss))
+            self._recent_losses.append(loss)
+            self._since_refit += 1
+            if len(self._history) >= self._warmup and (self._filter[0] is None or
+                                                       self._since_refit >= self._refit_interval):
+                self._since_refit = 0
+                self._refit_requested.set()
+
+    def _refit_loop(self):
+        while True:
+            self._refit_requested.wait()
+            self._refit_requested.clear()
+            if self._stopped:
+                return
+            with self._lock:
+                history = list(self._history)
+                recent_losses = np.fromiter(self._recent_losses, dtype=float)
+            if len(history) > self._fit_size:
+                indices = self._fit_random.choice(len(history), self._fit_size, replace=False)
+                history = [history[index] for index in indices]
+            x = np.stack([sample[0] for sample in history])
+            y = np.array([sample[1] for sample in history])
+            # 拟合耗时较长，在锁外完成后再整体替换
+            self._filter = (KNeighbors(x, y, self._neighbors), float(np.quantile(recent_losses, self._quantile)))
+
+    def summary(self):
+        with self._lock:
+            submitted = max(self._submitted, 1)
+            passed = max(self._passed, 1)
+            audited = max(self._audited, 1)
+            return (f'surrogate: skipped {self._skipped}/{self._submitted} evaluations '
+                    f'({self._skipped / submitted:.1%}), '
+                    f'wrongly passed {self._false_passes}/{self._passed} ({self._false_passes / passed:.1%}), '
+                    f'wrongly rejected {self._false_rejects}/{self._audited} audited '
+                    f'({self._false_rejects / audited:.1%})')
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self._stopped = True
+        self._refit_requested.set()
+        self._executor.shutdown(wait, cancel_futures=cancel_futures)
+        if wait:
+            self._refit_thread.join()
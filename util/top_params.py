@@ -0,0 +1,85 @@
+import dataclasses
+import heapq
+import json
+import os
+import pathlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from nevergrad.optimization import Optimizer
+    from nevergrad.parametrization.core import Parameter
+
+from util.transaction_params import TransactionParams
+
+TOP_PARAMS_FILE = pathlib.Path(__file__).parent.parent / 'top_params.json'
+TOP_COUNT = 50
+WRITE_INTERVAL = 10000  # 每计算多少次写一次文件（优化结束时也会写）
+
+
+class TopParams:
+    """
+    保存损失最小的count组不同的交易参数（不同的候选参数可能对应相同的交易参数），
+    注册为tell回调，定期按损失从小到大写入JSON文件，格式与batch-report的--params相同
+    """
+
+    def __init__(self, file: str | pathlib.Path = TOP_PARAMS_FILE, count: int = TOP_COUNT,
+                 to_params=TransactionParams, write_interval: int = WRITE_INTERVAL):
+        """
+        :param file: 输出文件
+        :param count: 保存的参数组数
+        :param to_params: 把候选参数转换为TransactionParams的函数
+        :param write_interval: 每计算多少次写一次文件
+        """
+        self._file = file
+        self._count = count
+        self._to_params = to_params
+        self._write_interval = write_interval
+        self._heap: list[tuple[float, tuple]] = []  # 最大堆：(-损失, 交易参数)
+        self._members: set[tuple] = set()
+        self._evaluations = 0
+        self._changed = False
+
+    def __call__(self, optimizer: 'Optimizer', candidate: 'Parameter', loss: float):
+        self._evaluations += 1
+        heap = self._heap
+        if len(heap) < self._count or loss < -heap[0][0]:
+            self._add(loss, dataclasses.astuple(self._to_params(*candidate.args)))
+        if self._changed and self._evaluations % self._write_interval == 0:
+            self.write()
+
+    def _add(self, loss: float, params: tuple):
+        if params in self._members:
+            return
+        if len(self._heap) < self._count:
+            heapq.heappush(self._heap, (-loss, params))
+        else:
+            _, removed = heapq.heapreplace(self._heap, (-loss, params))
+            self._members.discard(removed)
+        self._members.add(params)
+        self._changed = True
+
+    def ranked(self):
+        """
+        :return: 按损失从小到大排序的(损失, 交易参数)列表
+        """
+        return [(-negative_loss, TransactionParams(*params))
+                for negative_loss, params in sorted(self._heap, key=lambda item: -item[0])]
+
+    def write(self):
+        # 先写入临时文件再替换，中断时不会留下不完整的文件
+        temp_file = f'{self._file}.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump([dataclasses.asdict(params) for _, params in self.ranked()], f, indent=2)
+        os.replace(temp_file, self._file)
+        self._changed = False
+
+
+def read_top_params(file: str | pathlib.Path = TOP_PARAMS_FILE, count: int | None = None):
+    """
+    读取交易参数列表（TopParams的输出或手动编写的JSON文件）
+    :param file: JSON文件
+    :param count: 返回的参数组数，为None时返回全部
+    :return: 交易参数列表
+    """
+    with open(file, encoding='utf-8') as f:
+        return [TransactionParams(**values) for values in json.load(f)][:count]